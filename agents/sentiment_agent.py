@@ -0,0 +1,211 @@
+import re
+from typing import List, Dict, Any
+
+import numpy as np
+
+# --- 1. Lexicons ---
+# A small, local lexicon keeps scoring on the CPU with no model downloads or API calls.
+# Sentiment weights range from -1 (very negative) to +1 (very positive).
+SENTIMENT_LEXICON = {
+    "good": 0.5, "great": 0.8, "excellent": 0.9, "happy": 0.7, "thanks": 0.4, "thank": 0.4,
+    "perfect": 0.8, "love": 0.7, "glad": 0.6, "helpful": 0.6, "sure": 0.3, "yes": 0.2,
+    "stable": 0.5, "saving": 0.4, "savings": 0.4, "promotion": 0.6, "bonus": 0.5, "married": 0.4,
+    "bad": -0.5, "terrible": -0.9, "angry": -0.7, "upset": -0.6, "sad": -0.6, "problem": -0.4,
+    "confused": -0.3, "expensive": -0.4, "rejected": -0.6, "unfair": -0.6, "disappointed": -0.7,
+    "worse": -0.6, "worst": -0.9, "hate": -0.8,
+}
+
+# Stress weights range from 0 to 1 and capture financial distress rather than tone.
+STRESS_LEXICON = {
+    "urgent": 0.6, "urgently": 0.6, "emergency": 0.8, "hospital": 0.6, "medical": 0.4,
+    "worried": 0.7, "worry": 0.6, "tension": 0.7, "stress": 0.7, "stressed": 0.8, "anxious": 0.7,
+    "debt": 0.5, "debts": 0.5, "overdue": 0.7, "default": 0.8, "defaulted": 0.9, "emi": 0.2,
+    "jobless": 0.9, "unemployed": 0.9, "fired": 0.8, "layoff": 0.8, "desperate": 0.9,
+    "borrowed": 0.4, "struggling": 0.8, "late": 0.5, "penalty": 0.5,
+}
+
+# Multi-word stress phrases. These contain a negation word, so they are matched on the
+# whole message rather than token by token.
+STRESS_PHRASES = {"can't afford": 0.8, "cannot afford": 0.8, "cant afford": 0.8, "unable to afford": 0.8}
+
+NEGATIONS = {"not", "no", "never", "dont", "don't", "cannot", "can't", "isn't", "wasn't"}
+NEGATION_WINDOW = 3  # A negation applies to this many following words (e.g., "not very worried")
+
+EWMA_ALPHA = 0.3  # Weight of the newest turn in the running averages
+NEUTRAL_BEHAVIOUR_POINTS = 15  # FHI points when there is no conversation to score
+
+
+def _normalize(text: str) -> str:
+    return text.lower().replace("\u2019", "'")
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z']+", _normalize(text))
+
+
+# --- 2. Single-Turn Scoring ---
+def score_text(text: str) -> Dict[str, float]:
+    """
+    Scores one message for sentiment and financial stress.
+
+    A negation flips the sentiment and cancels the stress of the next NEGATION_WINDOW
+    words. This is a simple heuristic that ignores clauses and punctuation, so in
+    "no savings, debt piling up" the stress of "debt" is cancelled too.
+
+    Args:
+        text: The customer's message.
+
+    Returns:
+        A dictionary with "sentiment" in [-1, 1] and "stress" in [0, 1].
+    """
+    normalized = _normalize(text)
+    stress_total = sum(weight * normalized.count(phrase) for phrase, weight in STRESS_PHRASES.items())
+    sentiment_total, hits = 0.0, 0
+    negated_words = 0
+    for token in _tokenize(text):
+        if token in NEGATIONS:
+            negated_words = NEGATION_WINDOW
+            continue
+        negate = negated_words > 0
+        weight = SENTIMENT_LEXICON.get(token)
+        if weight is not None:
+            sentiment_total += -weight if negate else weight
+            hits += 1
+        if not negate:
+            stress_total += STRESS_LEXICON.get(token, 0.0)
+        negated_words = max(negated_words - 1, 0)
+
+    sentiment = sentiment_total / hits if hits else 0.0
+    stress = min(stress_total, 1.0)
+    return {"sentiment": sentiment, "stress": stress}
+
+
+# --- 3. Incremental Session State ---
+def new_sentiment_state() -> Dict[str, Any]:
+    """Returns an empty per-session sentiment state."""
+    return {"turns": 0, "sentiment_sum": 0.0,
+            "sentiment_ewma": 0.0, "stress_ewma": 0.0, "peak_stress": 0.0}
+
+
+def update_sentiment_state(state: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """
+    Folds a single new customer turn into the running session state.
+
+    Only the new message is scored, so the cost per turn stays constant
+    no matter how long the conversation history grows.
+
+    Args:
+        state: The session state from new_sentiment_state() or a previous update.
+        text: The newest customer message.
+
+    Returns:
+        The updated state (the same dictionary, modified in place).
+    """
+    scores = score_text(text)
+    if state["turns"] == 0:
+        state["sentiment_ewma"] = scores["sentiment"]
+        state["stress_ewma"] = scores["stress"]
+    else:
+        state["sentiment_ewma"] += EWMA_ALPHA * (scores["sentiment"] - state["sentiment_ewma"])
+        state["stress_ewma"] += EWMA_ALPHA * (scores["stress"] - state["stress_ewma"])
+    state["turns"] += 1
+    state["sentiment_sum"] += scores["sentiment"]
+    state["peak_stress"] = max(state["peak_stress"], scores["stress"])
+    return state
+
+
+def summarize_sentiment(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Condenses a session state into the values shown to underwriting and the status panel."""
+    turns = state["turns"]
+    return {
+        "turns": turns,
+        "sentiment": round(state["sentiment_ewma"], 3),
+        "stress": round(state["stress_ewma"], 3),
+        "avg_sentiment": round(state["sentiment_sum"] / turns, 3) if turns else 0.0,
+        "peak_stress": round(state["peak_stress"], 3),
+    }
+
+
+def sentiment_to_fhi_points(summary: Dict[str, Any]) -> int:
+    """
+    Converts a sentiment summary into the behavioural component of the FHI (0 to 20 points).
+
+    Positive, calm conversations earn more points; sustained financial stress earns fewer.
+    Sessions with no scored turns get the neutral default.
+    """
+    if not summary or not summary.get("turns"):
+        return NEUTRAL_BEHAVIOUR_POINTS
+    points = NEUTRAL_BEHAVIOUR_POINTS + 5 * summary["sentiment"] - 10 * summary["stress"]
+    return int(round(min(max(points, 0), 20)))
+
+
+# --- 4. Batched Transcript Scoring ---
+def score_transcripts(transcripts: List[List[str]]) -> List[Dict[str, Any]]:
+    """
+    Scores archived transcripts in bulk.
+
+    Every customer turn across all transcripts is scored in a single pass, and the
+    per-transcript averages are then reduced with NumPy instead of one loop per session.
+    The results match what the incremental mode would have produced for each session.
+
+    Args:
+        transcripts: A list of conversation histories in the app's "User: ..." / "AI: ..." format.
+            Only "User:" lines are scored; turns the app sends on its own are stored as "System:".
+
+    Returns:
+        One summary per transcript, in the same order.
+    """
+    user_turns, lengths = [], []
+    for history in transcripts:
+        turns = [line[len("User:"):].strip() for line in history if line.startswith("User:")]
+        user_turns.extend(turns)
+        lengths.append(len(turns))
+
+    scores = [score_text(turn) for turn in user_turns]
+    sentiment = np.array([s["sentiment"] for s in scores], dtype=float)
+    stress = np.array([s["stress"] for s in scores], dtype=float)
+    counts = np.array(lengths, dtype=int)
+    owners = np.repeat(np.arange(len(transcripts)), counts)
+
+    # EWMA weights per turn, matching what update_sentiment_state() would produce turn by turn.
+    starts = np.cumsum(counts) - counts
+    position = np.arange(len(owners)) - starts[owners]
+    from_end = counts[owners] - 1 - position
+    weights = EWMA_ALPHA * (1 - EWMA_ALPHA) ** from_end
+    weights[position == 0] = (1 - EWMA_ALPHA) ** from_end[position == 0]
+
+    sentiment_ewma = np.bincount(owners, weights=weights * sentiment, minlength=len(transcripts))
+    stress_ewma = np.bincount(owners, weights=weights * stress, minlength=len(transcripts))
+    sentiment_sum = np.bincount(owners, weights=sentiment, minlength=len(transcripts))
+    peak_stress = np.zeros(len(transcripts))
+    np.maximum.at(peak_stress, owners, stress)
+    safe_counts = np.maximum(counts, 1)
+
+    return [
+        {
+            "turns": int(counts[i]),
+            "sentiment": round(float(sentiment_ewma[i]), 3),
+            "stress": round(float(stress_ewma[i]), 3),
+            "avg_sentiment": round(float(sentiment_sum[i] / safe_counts[i]), 3),
+            "peak_stress": round(float(peak_stress[i]), 3),
+        }
+        for i in range(len(transcripts))
+    ]
+
+
+# --- 5. Test Block ---
+if __name__ == '__main__':
+    print("--- Testing Sentiment Agent ---")
+    session = new_sentiment_state()
+    for message in ["Hello, thanks for the help!", "I need a loan urgently for a medical emergency.",
+                    "I am really worried about my debts."]:
+        update_sentiment_state(session, message)
+        summary = summarize_sentiment(session)
+        print(f"{message!r} -> {summary} -> FHI points: {sentiment_to_fhi_points(summary)}")
+
+    print("\n--- Batched Mode ---")
+    archive = [["User: Great service, thank you", "AI: Happy to help!"],
+               ["User: I lost my job and I am stressed", "AI: I'm sorry to hear that."],
+               []]
+    for result in score_transcripts(archive):
+        print(result)
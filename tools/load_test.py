@@ -0,0 +1,220 @@
+# Load test for the full customer journey. Run from the project root with either
+#   python tools/load_test.py --levels 1,8,32
+#   python -m tools.load_test --levels 1,8,32
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+# Make the project root importable when this file is run directly as a script.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The load test always runs against the stub LLM, so this must be set before the workflow is imported.
+os.environ["ARTHMITHRA_STUB_LLM"] = "1"
+
+import workflow as wf
+from tools.api_mocks import app as mock_app
+from tools.offer_engine import clear_offer_cache
+
+# --- 1. Journey Configuration ---
+# Each simulated customer sends a few chat turns and uploads a KYC document, as a real
+# user of app.py does, then accepts the offer and asks for tips (not yet reachable from the UI).
+CHAT_SCRIPT = [
+    "Hello",
+    "I am getting married next month and need some help with the expenses.",
+    "What interest rate can I expect for a personal loan?",
+    "Thanks, that sounds good. How long can I take to repay?",
+]
+ACCEPT_MESSAGE = "Yes, I accept the offer. Please generate the sanction letter."
+TIPS_MESSAGE = "Yes, please share some tips."
+
+STAGES = ["chat", "kyc", "acceptance", "tips", "session"]
+# Stages whose nodes the Streamlit UI cannot reach yet (see run_session); flagged in the report.
+UNREACHABLE_STAGES = {"acceptance", "tips"}
+
+
+def create_fixture_images(directory: str) -> list:
+    """Creates dummy Aadhar and PAN card images for the KYC stage."""
+    fixtures = []
+    for doc_type, text in [("aadhar", "1234 5678 9012"), ("pan", "ABCDE1234F")]:
+        image = Image.new("RGB", (640, 400), "white")
+        ImageDraw.Draw(image).text((40, 180), f"{doc_type.upper()} {text}", fill="black")
+        path = os.path.join(directory, f"{doc_type}_fixture.png")
+        image.save(path)
+        fixtures.append(path)
+    return fixtures
+
+
+# --- 2. Mock Market API Server ---
+class _QuietRequestHandler(WSGIRequestHandler):
+    """Keeps the per-request access log out of the load test report."""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def start_mock_api(port: int):
+    """Runs tools/api_mocks.py in a background thread and points the offer engine at it."""
+    server = make_server("127.0.0.1", port, mock_app, threaded=True, request_handler=_QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["MARKET_API_URL"] = f"http://127.0.0.1:{port}"
+    return server
+
+
+# --- 3. Simulated Customer Session ---
+def run_session(session_id: int, fixtures: list, chat_turns: int) -> dict:
+    """
+    Runs one customer journey end to end and times each stage.
+
+    Args:
+        session_id: Index of the session, used to alternate the KYC fixture.
+        fixtures: Paths to the fixture images.
+        chat_turns: How many messages from CHAT_SCRIPT to send.
+
+    Returns:
+        A dictionary with the stage timings (in seconds) and the final session state.
+    """
+    timings = {stage: [] for stage in STAGES}
+    session_start = time.perf_counter()
+    state = wf.AppState(
+        customer_query="", conversation_history=[], customer_data={},
+        current_persona="Friendly Advisor", underwriting_result={},
+        sentiment_state=wf.new_sentiment_state(), synthetic_turn=False, final_response="", task_is_done=False
+    )
+
+    # Chat turns go through the compiled graph, exactly like the chat input in app.py
+    for message in CHAT_SCRIPT[:chat_turns]:
+        start = time.perf_counter()
+        state["customer_query"] = message
+        state = wf.app.invoke(state)
+        timings["chat"].append(time.perf_counter() - start)
+
+    # KYC upload runs the same helper as the upload handler in app.py
+    start = time.perf_counter()
+    state = wf.process_kyc_upload(state, fixtures[session_id % len(fixtures)])
+    timings["kyc"].append(time.perf_counter() - start)
+
+    # The UI never reaches the sanction letter and education nodes: chat input always
+    # enters the graph at "sales", which goes straight to END. These stages call the
+    # nodes directly, so their numbers describe a path no real customer takes yet.
+    if state["underwriting_result"].get("approved"):
+        start = time.perf_counter()
+        state["customer_query"] = ACCEPT_MESSAGE
+        state = wf.sanction_letter_node(state)
+        timings["acceptance"].append(time.perf_counter() - start)
+
+        state["customer_query"] = TIPS_MESSAGE
+        if wf.route_after_sanction_letter(state) == "education":
+            start = time.perf_counter()
+            state = wf.education_node(state)
+            timings["tips"].append(time.perf_counter() - start)
+
+    timings["session"].append(time.perf_counter() - session_start)
+    return {"timings": timings, "state": state}
+
+
+# --- 4. Load Levels ---
+def run_level(concurrency: int, sessions: int, fixtures: list, chat_turns: int, measure_memory: bool) -> dict:
+    """Runs `sessions` journeys with `concurrency` workers and aggregates the results."""
+    clear_offer_cache()
+
+    def run_all():
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(lambda i: run_session(i, fixtures, chat_turns), range(sessions)))
+
+    start = time.perf_counter()
+    results = run_all()
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 3),
+        "sessions_per_s": round(sessions / elapsed, 2),
+        "stages": {},
+    }
+    for stage in STAGES:
+        samples = np.array([t for r in results for t in r["timings"][stage]]) * 1000
+        if samples.size:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            report["stages"][stage] = {"count": int(samples.size), "p50_ms": round(p50, 2),
+                                       "p95_ms": round(p95, 2), "p99_ms": round(p99, 2),
+                                       "reachable_from_ui": stage not in UNREACHABLE_STAGES}
+
+    # Memory is measured in a separate pass because tracemalloc slows everything down
+    # and would distort the latency figures above.
+    if measure_memory:
+        del results
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        retained = run_all()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["retained_kb_per_session"] = round((current - baseline) / len(retained) / 1024, 1)
+        report["peak_kb_per_session"] = round((peak - baseline) / len(retained) / 1024, 1)
+
+    return report
+
+
+def print_report(report: dict):
+    """Prints one load level as a small table."""
+    print(f"\n=== Concurrency {report['concurrency']}: {report['sessions']} sessions in {report['elapsed_s']}s "
+          f"({report['sessions_per_s']} sessions/s) ===")
+    if "retained_kb_per_session" in report:
+        print(f"Memory per session: {report['retained_kb_per_session']} KB retained, "
+              f"{report['peak_kb_per_session']} KB peak")
+    print(f"{'Stage':<12}{'Count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for stage, stats in report["stages"].items():
+        note = "" if stats["reachable_from_ui"] else "  (*)"
+        print(f"{stage:<12}{stats['count']:>8}{stats['p50_ms']:>12}{stats['p95_ms']:>12}{stats['p99_ms']:>12}{note}")
+    if any(not stats["reachable_from_ui"] for stats in report["stages"].values()):
+        print("(*) Node called directly; the Streamlit UI cannot reach it yet.")
+
+
+# --- 5. Main Execution Block ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test the ArthMithra workflow with concurrent customer sessions.")
+    parser.add_argument("--levels", default="1,2,4,8,16,32",
+                        help="Comma-separated concurrency levels to ramp through.")
+    parser.add_argument("--sessions-per-worker", type=int, default=3,
+                        help="Sessions to run per concurrent worker at each level.")
+    parser.add_argument("--chat-turns", type=int, default=len(CHAT_SCRIPT),
+                        help="Chat messages sent per session before the KYC upload.")
+    parser.add_argument("--llm-latency", type=float, default=0.2,
+                        help="Simulated seconds per stub LLM call.")
+    parser.add_argument("--api-port", type=int, default=5055, help="Port for the mock market API server.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the per-session memory pass.")
+    parser.add_argument("--json", help="Optional path to write the full report as JSON.")
+    args = parser.parse_args()
+
+    server = start_mock_api(args.api_port)
+    wf.llm.latency = args.llm_latency
+
+    print("--- ArthMithra Load Test ---")
+    print(f"Stub LLM latency: {args.llm_latency}s, mock API: {os.environ['MARKET_API_URL']}")
+
+    reports = []
+    try:
+        with tempfile.TemporaryDirectory() as fixture_dir:
+            fixture_paths = create_fixture_images(fixture_dir)
+            for level in [int(x) for x in args.levels.split(",")]:
+                level_report = run_level(level, level * args.sessions_per_worker, fixture_paths,
+                                         args.chat_turns, not args.no_memory)
+                print_report(level_report)
+                reports.append(level_report)
+    finally:
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nReport written to {args.json}")
@@ -0,0 +1,256 @@
+import os
+import threading
+import time
+import numpy as np
+import requests
+
+# --- 1. Offer Configuration ---
+# Each FHI bucket maps to the rate and maximum amount the underwriting agent can sanction.
+# The amount and tenure grids are the options we pre-compute for the customer.
+DEFAULT_MARKET_API_URL = "http://127.0.0.1:5000"  # Override with the MARKET_API_URL environment variable
+
+FHI_BUCKETS = {
+    "strong": {"min_fhi": 66, "interest_rate": 10.5, "max_amount": 500000},
+    "moderate": {"min_fhi": 41, "interest_rate": 12.5, "max_amount": 250000},
+}
+
+OUR_PROCESSING_FEE = 1.0  # Percentage of the principal
+TENURE_MONTHS = np.array([12, 24, 36, 48, 60])
+AMOUNT_STEPS = np.array([0.25, 0.5, 0.75, 1.0])  # Fractions of the bucket's maximum amount
+
+# Used when the market API server (tools/api_mocks.py) is not running.
+FALLBACK_COMPETITORS = {
+    "HDFC Bank": {"personal_loan_rate": 10.75, "processing_fee": 1.5},
+    "ICICI Bank": {"personal_loan_rate": 11.25, "processing_fee": 1.25},
+    "Bajaj Finserv": {"personal_loan_rate": 12.00, "processing_fee": 2.0},
+}
+
+# Offer matrices are cached per FHI bucket, so every customer in a bucket shares one computation.
+# Entries expire so fluctuating competitor rates are picked up; matrices built from the
+# fallback data expire sooner, so live rates are used again once the market API is back.
+OFFER_CACHE_TTL = 300  # Seconds
+FALLBACK_CACHE_TTL = 30  # Seconds
+_offer_cache = {}  # bucket -> (expires_at, offer matrix)
+# One lock per bucket, so a slow refresh of one bucket doesn't block cache misses for the others.
+_offer_cache_locks = {bucket: threading.Lock() for bucket in FHI_BUCKETS}
+
+
+# --- 2. Vectorized Loan Maths ---
+def compute_emi(amounts, tenures, annual_rate: float) -> np.ndarray:
+    """
+    Computes the monthly EMI for every (amount, tenure) pair in one call.
+
+    Args:
+        amounts: 1-D array of principal amounts in INR.
+        tenures: 1-D array of tenures in months.
+        annual_rate: Annual interest rate in percent (e.g., 10.5).
+
+    Returns:
+        A 2-D array of shape (len(amounts), len(tenures)) with the EMI for each pair.
+    """
+    principal = np.asarray(amounts, dtype=float)[:, None]
+    months = np.asarray(tenures, dtype=float)[None, :]
+    monthly_rate = annual_rate / 12 / 100
+
+    if monthly_rate == 0:
+        return principal / months
+
+    growth = (1 + monthly_rate) ** months
+    return principal * monthly_rate * growth / (growth - 1)
+
+
+def compute_amortization(amounts, tenures, annual_rate: float) -> dict:
+    """
+    Builds the full month-by-month amortization schedule for every (amount, tenure) pair.
+
+    Schedules shorter than the longest tenure are padded with zeros, so all of them
+    fit in one array of shape (len(amounts), len(tenures), max(tenures)).
+
+    Args:
+        amounts: 1-D array of principal amounts in INR.
+        tenures: 1-D array of tenures in months.
+        annual_rate: Annual interest rate in percent.
+
+    Returns:
+        A dictionary with the "emi" matrix and the "interest", "principal" and "balance"
+        schedules, indexed as [amount, tenure, month].
+    """
+    principal = np.asarray(amounts, dtype=float)[:, None, None]
+    months = np.asarray(tenures)[None, :, None]
+    monthly_rate = annual_rate / 12 / 100
+
+    emi = compute_emi(amounts, tenures, annual_rate)
+    k = np.arange(1, months.max() + 1)[None, None, :]
+    active = k <= months
+
+    # Closed-form outstanding balance after k payments, so no month-by-month loop is needed.
+    if monthly_rate == 0:
+        balance = principal - emi[:, :, None] * k
+        balance_before = principal - emi[:, :, None] * (k - 1)
+    else:
+        growth = (1 + monthly_rate) ** k
+        growth_before = (1 + monthly_rate) ** (k - 1)
+        balance = principal * growth - emi[:, :, None] * (growth - 1) / monthly_rate
+        balance_before = principal * growth_before - emi[:, :, None] * (growth_before - 1) / monthly_rate
+
+    interest = np.where(active, balance_before * monthly_rate, 0.0)
+    principal_paid = np.where(active, emi[:, :, None] - interest, 0.0)
+    balance = np.where(active, np.clip(balance, 0.0, None), 0.0)
+
+    return {"emi": emi, "interest": interest, "principal": principal_paid, "balance": balance}
+
+
+# --- 3. Competitor Data ---
+def fetch_competitor_offers(base_url: str = None) -> dict:
+    """Fetches competitor rates and fees from the market API, falling back to static data."""
+    base_url = base_url or os.getenv("MARKET_API_URL", DEFAULT_MARKET_API_URL)
+    try:
+        response = requests.get(f"{base_url}/api/v1/market/competitor-offers", timeout=2)
+        response.raise_for_status()
+        return response.json()["offers"]
+    except Exception as e:
+        print(f"Warning: Could not fetch competitor offers, using fallback data. Error: {e}")
+        return FALLBACK_COMPETITORS
+
+
+def get_fhi_bucket(fhi_score: int):
+    """Returns the name of the FHI bucket for a score, or None if no offer can be made."""
+    for bucket, config in FHI_BUCKETS.items():
+        if fhi_score >= config["min_fhi"]:
+            return bucket
+    return None
+
+
+# --- 4. Offer Matrix ---
+def build_offer_matrix(bucket: str, competitors: dict = None) -> dict:
+    """
+    Computes the complete offer grid for an FHI bucket and compares it to competitors.
+
+    Args:
+        bucket: One of the keys of FHI_BUCKETS.
+        competitors: Competitor offers as returned by fetch_competitor_offers().
+
+    Returns:
+        A dictionary with the grids, our EMI/interest/cost matrices and, for every
+        competitor, the same matrices plus our savings against them.
+    """
+    config = FHI_BUCKETS[bucket]
+    if competitors is None:
+        competitors = fetch_competitor_offers()
+    live_rates = competitors is not FALLBACK_COMPETITORS
+
+    amounts = config["max_amount"] * AMOUNT_STEPS
+    schedule = compute_amortization(amounts, TENURE_MONTHS, config["interest_rate"])
+    total_interest = schedule["interest"].sum(axis=2)
+    total_cost = total_interest + amounts[:, None] * OUR_PROCESSING_FEE / 100
+
+    comparison = {}
+    for bank, offer in competitors.items():
+        their_emi = compute_emi(amounts, TENURE_MONTHS, offer["personal_loan_rate"])
+        their_interest = their_emi * TENURE_MONTHS[None, :] - amounts[:, None]
+        their_cost = their_interest + amounts[:, None] * offer["processing_fee"] / 100
+        comparison[bank] = {
+            "interest_rate": offer["personal_loan_rate"],
+            "processing_fee": offer["processing_fee"],
+            "emi": their_emi,
+            "total_cost": their_cost,
+            "savings": their_cost - total_cost,
+        }
+
+    return {
+        "bucket": bucket,
+        "interest_rate": config["interest_rate"],
+        "processing_fee": OUR_PROCESSING_FEE,
+        "amounts": amounts,
+        "tenures": TENURE_MONTHS,
+        "emi": schedule["emi"],
+        "total_interest": total_interest,
+        "total_cost": total_cost,
+        "schedule": schedule,
+        "competitors": comparison,
+        "live_rates": live_rates,
+    }
+
+
+def get_offer_matrix(bucket: str) -> dict:
+    """Returns the cached offer matrix for a bucket, computing it on first use or once it has expired."""
+    entry = _offer_cache.get(bucket)
+    if entry is None or entry[0] <= time.monotonic():
+        # Concurrent sessions wait for one computation instead of all calling the market API.
+        with _offer_cache_locks[bucket]:
+            entry = _offer_cache.get(bucket)
+            if entry is None or entry[0] <= time.monotonic():
+                offer = build_offer_matrix(bucket)
+                ttl = OFFER_CACHE_TTL if offer["live_rates"] else FALLBACK_CACHE_TTL
+                entry = (time.monotonic() + ttl, offer)
+                _offer_cache[bucket] = entry
+    return entry[1]
+
+
+def clear_offer_cache():
+    """Drops all cached offer matrices, e.g. after a rate change."""
+    _offer_cache.clear()
+
+
+# --- 5. Presentation Tables ---
+def _inr(value: float) -> str:
+    return f"₹{value:,.0f}"
+
+
+def format_offer_tables(offer: dict, amount_index: int = -1, tenure_index: int = 2) -> str:
+    """
+    Renders the pre-computed offer as markdown tables, so the LLM only has to present them.
+
+    Args:
+        offer: An offer matrix from get_offer_matrix().
+        amount_index: Row of the amount grid to use for the comparison and schedule tables.
+        tenure_index: Column of the tenure grid to use for the comparison and schedule tables.
+
+    Returns:
+        A markdown string with the EMI grid, the competitor comparison and a yearly schedule.
+    """
+    amounts, tenures = offer["amounts"], offer["tenures"]
+
+    # EMI grid across all amounts and tenures
+    lines = [f"EMI options at {offer['interest_rate']}% p.a. (processing fee {offer['processing_fee']}%):", ""]
+    lines.append("| Amount | " + " | ".join(f"{t} months" for t in tenures) + " |")
+    lines.append("|---" * (len(tenures) + 1) + "|")
+    for i, amount in enumerate(amounts):
+        cells = [f"{_inr(offer['emi'][i, j])} (interest {_inr(offer['total_interest'][i, j])})"
+                 for j in range(len(tenures))]
+        lines.append(f"| {_inr(amount)} | " + " | ".join(cells) + " |")
+
+    # Competitor comparison for the highlighted option
+    amount, tenure = amounts[amount_index], tenures[tenure_index]
+    lines += ["", f"Comparison for {_inr(amount)} over {tenure} months:", ""]
+    lines.append("| Lender | Rate | Fee | EMI | Total cost | You save |")
+    lines.append("|---|---|---|---|---|---|")
+    lines.append(f"| SmartLoan360X | {offer['interest_rate']}% | {offer['processing_fee']}% | "
+                 f"{_inr(offer['emi'][amount_index, tenure_index])} | "
+                 f"{_inr(offer['total_cost'][amount_index, tenure_index])} | - |")
+    for bank, data in offer["competitors"].items():
+        lines.append(f"| {bank} | {data['interest_rate']}% | {data['processing_fee']}% | "
+                     f"{_inr(data['emi'][amount_index, tenure_index])} | "
+                     f"{_inr(data['total_cost'][amount_index, tenure_index])} | "
+                     f"{_inr(data['savings'][amount_index, tenure_index])} |")
+
+    # Yearly amortization summary for the highlighted option
+    schedule = offer["schedule"]
+    interest = schedule["interest"][amount_index, tenure_index, :tenure].reshape(-1, 12).sum(axis=1)
+    principal = schedule["principal"][amount_index, tenure_index, :tenure].reshape(-1, 12).sum(axis=1)
+    balance = schedule["balance"][amount_index, tenure_index, 11:tenure:12]
+    lines += ["", "Amortization by year:", ""]
+    lines.append("| Year | Principal paid | Interest paid | Balance |")
+    lines.append("|---|---|---|---|")
+    for year in range(len(interest)):
+        lines.append(f"| {year + 1} | {_inr(principal[year])} | {_inr(interest[year])} | {_inr(balance[year])} |")
+
+    return "\n".join(lines)
+
+
+# --- 6. Test Block ---
+if __name__ == '__main__':
+    print("--- Testing Offer Engine ---")
+    for bucket_name in FHI_BUCKETS:
+        print(f"\n--- Bucket: {bucket_name} ---")
+        print(format_offer_tables(get_offer_matrix(bucket_name)))
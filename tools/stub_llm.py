@@ -0,0 +1,23 @@
+import time
+from types import SimpleNamespace
+
+
+class StubLLM:
+    """
+    A drop-in stand-in for ChatOpenAI that returns canned responses without any API calls.
+
+    It is used for offline runs and load tests, where the real LLM would add cost and
+    unpredictable latency. An optional fixed latency simulates the round trip to the model.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def invoke(self, prompt: str):
+        """Mimics ChatOpenAI.invoke(): returns an object whose `.content` is the reply."""
+        if self.latency:
+            time.sleep(self.latency)
+
+        # Echo the last user line so responses stay tied to the prompt that produced them.
+        last_user_line = next((line for line in reversed(prompt.splitlines()) if line.startswith("User:")), "")
+        return SimpleNamespace(content=f"[Stub LLM] Thanks for your message. ({last_user_line[len('User:'):].strip()})")